@@ -19,10 +19,19 @@ This runs tvnamer with no custom config (can be a string). It then
 sends "1[return]y[return]" to the console UI, and verifies the file was
 created correctly, in a way that nosetest displays useful info when an
 expected file is not found.
+
+By default each call spawns a new Python interpreter. Setting the
+environment variable TVNAMER_INPROC=1 runs tvnamer inside the test process
+instead, which avoids paying interpreter startup and import time per test.
+TVNAMER_TEST_WORKER=1 is in-between: each test process (i.e. each
+pytest-xdist worker) starts one long-lived tvnamer._testserver subprocess
+and sends it every run.
 """
 
 import os
 import sys
+import json
+import atexit
 import shutil
 import tempfile
 import subprocess
@@ -30,6 +39,18 @@ import unicodedata
 
 import coverage
 
+from tvnamer._testserver import run_main
+
+
+# Run tvnamer in the test process instead of a subprocess
+IN_PROCESS_ENV_VAR = "TVNAMER_INPROC"
+
+# Run tvnamer in a persistent worker subprocess
+WORKER_ENV_VAR = "TVNAMER_TEST_WORKER"
+
+# Worker processes, keyed by whether they were started with coverage enabled
+_workers = {}
+
 try:
     # os.path.relpath was added in 2.6, use custom implimentation if not found
     relpath = os.path.relpath
@@ -65,9 +86,10 @@ def make_temp_config(config):
 
 
 def make_temp_dir():
-    """Creates a temp folder and returns the path
+    """Creates a temp folder and returns the path. Each call gets a unique
+    directory, so tests can be run in parallel (e.g. pytest -n auto)
     """
-    return tempfile.mkdtemp()
+    return tempfile.mkdtemp(prefix="tvnamer-%d-" % os.getpid())
 
 
 def make_dummy_files(files, location):
@@ -100,33 +122,9 @@ def clear_temp_dir(location):
     shutil.rmtree(location)
 
 
-def run_tvnamer(with_files, with_flags = None, with_input = "", with_config = None, run_on_directory = False, with_coverage = True):
-    """Runs tvnamer on list of file-names in with_files.
-    with_files is a list of strings.
-    with_flags is a list of command line arguments to pass to tvnamer.
-    with_input is the sent to tvnamer's stdin
-    with_config is a string containing the tvnamer to run tvnamer with.
-
-    Returns a dict with stdout, stderr and a list of files created
+def make_subprocess_env(with_coverage = True):
+    """Returns the environment for running tvnamer in a subprocess
     """
-    # Create dummy files (config and episodes)
-    episodes_location = make_temp_dir()
-    dummy_files = make_dummy_files(with_files, episodes_location)
-
-    if with_config is not None:
-        configfname = make_temp_config(with_config)
-        conf_args = ['-c', configfname]
-    else:
-        conf_args = []
-
-    if with_flags is None:
-        with_flags = []
-
-    if run_on_directory:
-        files = [episodes_location]
-    else:
-        files = dummy_files
-
     # Copy sys.path to PYTHONPATH so same modules are available as in
     # test environmen
     env = os.environ.copy()
@@ -142,8 +140,19 @@ def run_tvnamer(with_files, with_flags = None, with_input = "", with_config = No
         env['COVERAGE_PROCESS_START'] = covconf
         env['TVNAMER_COVERAGE_SUBPROCESS'] = ''
 
+    return env
+
+
+def run_subprocess(args, with_input = "", with_coverage = True):
+    """Runs tvnamer with args in a new Python interpreter, sending with_input
+    to its stdin.
+
+    Returns a tuple of the output (stdout and stderr combined) and return code
+    """
+    env = make_subprocess_env(with_coverage = with_coverage)
+
     # Construct command
-    cmd = [sys.executable, "-m", "tvnamer"] + conf_args + with_flags + files
+    cmd = [sys.executable, "-m", "tvnamer"] + args
 
     print("Running command:")
     print(" ".join(cmd))
@@ -158,7 +167,97 @@ def run_tvnamer(with_files, with_flags = None, with_input = "", with_config = No
     proc.stdin.write(with_input.encode("utf-8"))
     output, _ = proc.communicate()
 
-    output = output.decode("utf-8")
+    return output.decode("utf-8"), proc.returncode
+
+
+def get_worker(with_coverage = True):
+    """Returns the tvnamer._testserver process for this test process,
+    starting it on first use
+    """
+    worker = _workers.get(with_coverage)
+    if worker is None or worker.poll() is not None:
+        worker = subprocess.Popen(
+            [sys.executable, "-m", "tvnamer._testserver"],
+            stdout = subprocess.PIPE,
+            stdin = subprocess.PIPE,
+            env = make_subprocess_env(with_coverage = with_coverage),
+            universal_newlines = True)
+        _workers[with_coverage] = worker
+    return worker
+
+
+@atexit.register
+def stop_workers():
+    """Closes the workers' stdin so they exit (and write coverage data)
+    """
+    for worker in _workers.values():
+        worker.stdin.close()
+        worker.wait()
+    _workers.clear()
+
+
+def run_in_worker(args, with_input = "", with_coverage = True):
+    """Runs tvnamer with args in the persistent worker process, sending
+    with_input to its stdin.
+
+    Returns a tuple of the output and return code
+    """
+    worker = get_worker(with_coverage = with_coverage)
+
+    print("Running in worker %d:" % worker.pid)
+    print(" ".join(["tvnamer"] + args))
+
+    worker.stdin.write(json.dumps({'argv': args, 'stdin': with_input}) + "\n")
+    worker.stdin.flush()
+
+    response = worker.stdout.readline()
+    if not response:
+        raise RuntimeError("tvnamer test worker exited with code %s" % worker.wait())
+    response = json.loads(response)
+
+    return response['output'], response['returncode']
+
+
+def run_tvnamer(with_files, with_flags = None, with_input = "", with_config = None, run_on_directory = False, with_coverage = True, in_process = None):
+    """Runs tvnamer on list of file-names in with_files.
+    with_files is a list of strings.
+    with_flags is a list of command line arguments to pass to tvnamer.
+    with_input is the sent to tvnamer's stdin
+    with_config is a string containing the tvnamer to run tvnamer with.
+    in_process runs tvnamer in the test process rather than a subprocess,
+    if None the TVNAMER_INPROC environment variable decides.
+
+    Returns a dict with stdout, stderr and a list of files created
+    """
+    if in_process is None:
+        in_process = os.getenv(IN_PROCESS_ENV_VAR, "0") == "1"
+
+    # Create dummy files (config and episodes)
+    episodes_location = make_temp_dir()
+    dummy_files = make_dummy_files(with_files, episodes_location)
+
+    if with_config is not None:
+        configfname = make_temp_config(with_config)
+        conf_args = ['-c', configfname]
+    else:
+        conf_args = []
+
+    if with_flags is None:
+        with_flags = []
+
+    if run_on_directory:
+        files = [episodes_location]
+    else:
+        files = dummy_files
+
+    args = conf_args + with_flags + files
+
+    if in_process:
+        output, returncode = run_main(args, stdin = with_input)
+    elif os.getenv(WORKER_ENV_VAR, "0") == "1":
+        output, returncode = run_in_worker(args, with_input = with_input, with_coverage = with_coverage)
+    else:
+        output, returncode = run_subprocess(args, with_input = with_input, with_coverage = with_coverage)
 
     created_files = []
 
@@ -182,7 +281,7 @@ def run_tvnamer(with_files, with_flags = None, with_input = "", with_config = No
     return {
         'output': output,
         'files': created_files,
-        'returncode': proc.returncode}
+        'returncode': returncode}
 
 
 def verify_out_data(out_data, expected_files, expected_returncode = 0):
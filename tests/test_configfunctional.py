@@ -3,120 +3,69 @@
 """Tests various configs load correctly
 """
 
+import json
+
 from functional_runner import run_tvnamer, verify_out_data
 from helpers import attr
 import pytest
 
 
 @attr("functional")
-def test_batchconfig():
-    """Test configured batch mode works
-    """
-
-    conf = """
-    {"always_rename": true,
-    "select_first": true}
-    """
-
-    out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi'],
-        with_config = conf,
-        with_input = "")
-
-    expected_files = ['Scrubs - [01x01] - My First Day.avi']
-
-    verify_out_data(out_data, expected_files)
-
-
-@attr("functional")
-def test_never_skip_file():
-    """Test default of skipping file on error
-    """
-
-    conf = """
-    {"batch": true}
-    """
-
-    out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
-        with_config = conf,
-        with_input = "")
-
-    expected_files = ['Scrubs - [01x01] - My First Day.avi', 'a.nonsense.fake.episode.s01e01.avi']
-
-    verify_out_data(out_data, expected_files)
-
-
-@attr("functional")
-def test_never_skip_file():
-    """Test for using skip_file_on_error to always do best-effort rename of file without TVDB data
-    """
-
-    conf = """
-    {"batch": true,
-    "skip_file_on_error": false}
-    """
-
-    out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
-        with_config = conf,
-        with_input = "")
-
-    expected_files = ['Scrubs - [01x01] - My First Day.avi', 'a nonsense fake episode - [01x01].avi']
-
-    verify_out_data(out_data, expected_files)
-
-
-@attr("functional")
-def test_skip_behaviour_warn():
-    """skip_behaviour:warn should keep renaming other files
-    """
-
-    conf = """
-    {"batch": true,
-    "skip_behaviour": "warn"}
-    """
-
-    out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
-        with_config = conf,
-        with_input = "")
-
-    expected_files = ['Scrubs - [01x01] - My First Day.avi', 'a.nonsense.fake.episode.s01e01.avi']
-
-    verify_out_data(out_data, expected_files)
-
-
-@attr("functional")
-def test_skip_behaviour_error():
-    """An error with skip_behaviour 'exit' should end process
-    """
-
-    conf = """
-    {"batch": true,
-    "skip_behaviour": "exit"}
+@pytest.mark.parametrize("conf,with_files,expected_files,expected_returncode", [
+    # Test configured batch mode works
+    pytest.param(
+        {"always_rename": True, "select_first": True},
+        ['scrubs.s01e01.avi'],
+        ['Scrubs - [01x01] - My First Day.avi'],
+        0,
+        id="batchconfig"),
+    # Test default of skipping file on error
+    pytest.param(
+        {"batch": True},
+        ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        ['Scrubs - [01x01] - My First Day.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        0,
+        id="skip_file_default"),
+    # Test for using skip_file_on_error to always do best-effort rename of file without TVDB data
+    pytest.param(
+        {"batch": True, "skip_file_on_error": False},
+        ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        ['Scrubs - [01x01] - My First Day.avi', 'a nonsense fake episode - [01x01].avi'],
+        0,
+        id="never_skip_file"),
+    # skip_behaviour:warn should keep renaming other files
+    pytest.param(
+        {"batch": True, "skip_behaviour": "warn"},
+        ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        ['Scrubs - [01x01] - My First Day.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        0,
+        id="skip_behaviour_warn"),
+    # An error with skip_behaviour 'exit' should end process. Files are
+    # processed alphabetically, so file starting wiht S is never touched
+    pytest.param(
+        {"batch": True, "skip_behaviour": "exit"},
+        ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
+        2,
+        id="skip_behaviour_error_first"),
+    # ..while a file sorted after the error was already renamed
+    pytest.param(
+        {"batch": True, "skip_behaviour": "exit"},
+        ['scrubs.s01e01.avi', 'z.fake.episode.s01e01.avi'],
+        ['Scrubs - [01x01] - My First Day.avi', 'z.fake.episode.s01e01.avi'],
+        2,
+        id="skip_behaviour_error_last"),
+])
+def test_batch_and_skip_behaviour(conf, with_files, expected_files, expected_returncode):
+    """Tests batch mode and the handling of files which cannot be renamed
     """
 
     out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi'],
-        with_config = conf,
+        with_files = with_files,
+        with_config = json.dumps(conf),
         with_input = "")
 
-    # Files are processed alphabetically, so file starting wiht S is never touched
-    expected_files = ['scrubs.s01e01.avi', 'a.nonsense.fake.episode.s01e01.avi']
-
-    verify_out_data(out_data, expected_files, expected_returncode=2)
-
-
-    out_data = run_tvnamer(
-        with_files = ['scrubs.s01e01.avi', 'z.fake.episode.s01e01.avi'],
-        with_config = conf,
-        with_input = "")
-
-    # Files are processed alphabetically, so file starting wiht S is never touched
-    expected_files = ['Scrubs - [01x01] - My First Day.avi', 'z.fake.episode.s01e01.avi']
-
-    verify_out_data(out_data, expected_files, expected_returncode=2)
+    verify_out_data(out_data, expected_files, expected_returncode=expected_returncode)
 
 
 @attr("functional")
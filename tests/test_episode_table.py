@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+"""Tests the table of episodes shown while renaming
+"""
+
+import io
+
+from rich.console import Console
+
+from tvnamer.main import EpisodeTable, TABLE_MAX_ROWS
+from helpers import assertEquals
+
+
+def _render(renderable):
+    console = Console(width=100, file=io.StringIO())
+    console.print(renderable)
+    return console.file.getvalue()
+
+
+def test_episode_table_keeps_latest_rows():
+    """Only the latest TABLE_MAX_ROWS episodes should be shown, followed by
+    the summary rows
+    """
+    table = EpisodeTable(show_time=True)
+    count = TABLE_MAX_ROWS + 10
+    for i in range(count):
+        table.add_episode_row("orig%03d.avi" % i, "new.avi", "/dest", "1.0 KiB", "0s")
+    table.add_row(None, None, None, None, None, end_section=True)
+    table.add_row(None, None, "Gesamt:", "60.0 KiB", "1s")
+
+    output = _render(table)
+    assertEquals(output.count("orig"), TABLE_MAX_ROWS)
+    assert "orig%03d.avi" % (count - TABLE_MAX_ROWS - 1) not in output
+    assert "orig%03d.avi" % (count - TABLE_MAX_ROWS) in output
+    assert "orig%03d.avi" % (count - 1) in output
+    assert output.index("orig%03d.avi" % (count - 1)) < output.index("Gesamt:")
+    assert "Dauer" in output
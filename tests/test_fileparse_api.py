@@ -3,6 +3,7 @@
 """Tests the FileParser API
 """
 
+from tvnamer.config import Config
 from tvnamer.files import FileParser
 from tvnamer.data import EpisodeInfo, DatedEpisodeInfo, NoSeasonEpisodeInfo
 from helpers import assertType, assertEquals
@@ -51,3 +52,45 @@ def test_noseasonepisodeinfo_naming():
     p = FileParser("scrubs - e23.avi").parse()
     assertType(p, NoSeasonEpisodeInfo)
     assertEquals(p.generate_filename(), "scrubs - [23].avi")
+
+
+def test_repeated_parse_returns_new_instance(tmp_path):
+    """Parsing the same filename twice should give separate instances, so
+    changing one does not affect the other
+    """
+    path = tmp_path / "scrubs.s01e01.avi"
+    path.touch()
+
+    first = FileParser(str(path)).parse()
+    first.seriesname = "Changed"
+    first.episodenumbers.append(2)
+    first.extra["episodename"] = "Changed"
+
+    second = FileParser(str(path)).parse()
+    assert first is not second
+    assertEquals(second.seriesname, "scrubs")
+    assertEquals(second.episodenumbers, [1])
+    assertEquals(second.generate_filename(), "scrubs - [01x01].avi")
+
+
+def test_repeated_parse_warns_every_time(capsys):
+    """Warnings found while parsing should be shown for every parse, not only
+    the first one (the parse result is cached)
+    """
+    for _ in range(2):
+        p = FileParser("scrubs.s01e01-e10.avi").parse()
+        assertEquals(p.episodenumbers, [1])
+        assert "9 episodes detected in file" in capsys.readouterr().err
+
+
+def test_invalid_pattern_warns_every_time(capsys, monkeypatch):
+    """An invalid filename pattern should be warned about by every FileParser
+    """
+    monkeypatch.setitem(Config, "filename_patterns", [
+        "(?P<seriesname>.+",
+        "^(?P<seriesname>.+?)[ \\.]s(?P<seasonnumber>\\d+)e(?P<episodenumber>\\d+)",
+    ])
+    for _ in range(2):
+        p = FileParser("scrubs.s01e01.avi").parse()
+        assertEquals(p.seasonnumber, 1)
+        assert "Invalid episode_pattern" in capsys.readouterr().err
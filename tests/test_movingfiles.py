@@ -3,8 +3,12 @@
 """Tests moving renamed files
 """
 
+import os
+import errno
+
 from functional_runner import run_tvnamer, verify_out_data
-from helpers import attr
+from helpers import attr, assertEquals
+from tvnamer.files import rename_file
 
 
 @attr("functional")
@@ -395,3 +399,24 @@ def test_forcefully_moving_default():
         'tv/Scrubs/season 1/Scrubs - [01x01] - My First Day.avi']
 
     verify_out_data(out_data, expected_files)
+
+
+def test_rename_file_across_filesystems(tmp_path, monkeypatch):
+    """When a rename fails because the destination is on another filesystem,
+    the file should be copied instead, keeping its modification time
+    """
+
+    old = tmp_path / "scrubs.s01e01.avi"
+    old.write_text("episode")
+    os.utime(str(old), (1000000000, 1000000000))
+    new = tmp_path / "Scrubs - [01x01] - My First Day.avi"
+
+    def cross_device_replace(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "replace", cross_device_replace)
+    rename_file(str(old), str(new))
+
+    assert not old.exists()
+    assertEquals(new.read_text(), "episode")
+    assertEquals(int(new.stat().st_mtime), 1000000000)
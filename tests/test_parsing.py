@@ -3,9 +3,12 @@
 """Test tvnamer's filename parser
 """
 
+import re
+
 from helpers import assertEquals
 
-from tvnamer.files import FileParser
+from tvnamer.config_defaults import defaults
+from tvnamer.files import FileParser, _PATTERN_HINTS
 from tvnamer.data import (DatedEpisodeInfo, NoSeasonEpisodeInfo)
 
 from test_files import files
@@ -124,6 +127,54 @@ def test_parsing_generator():
             check_case(curtest)
 
 
+def test_pattern_hints():
+    """Each default filename pattern has a hint, and a filename matching the
+    pattern always contains that hint (otherwise the pattern would be skipped)
+    """
+    assertEquals(len(_PATTERN_HINTS), len(defaults['filename_patterns']))
+
+    for category, testcases in files.items():
+        for curtest in testcases:
+            for cpattern in defaults['filename_patterns']:
+                hint = _PATTERN_HINTS[cpattern]
+                if hint is None:
+                    continue
+                if re.match(cpattern, curtest['input'], re.VERBOSE):
+                    assert hint in curtest['input'].lower(), "%r matched pattern, but does not contain %r" % (
+                        curtest['input'], hint)
+
+
+def _without_hint(name, hint):
+    """Variants of name with every occurrence of hint replaced by other
+    characters
+    """
+    for replacement in ("", " ", ".", "-", "_", "0", "a"):
+        variant = re.sub(re.escape(hint), replacement, name, flags=re.IGNORECASE)
+        if hint not in variant.lower():
+            yield variant
+
+
+def test_pattern_hints_are_required():
+    """A filename without a pattern's hint should never match that pattern,
+    also when the rest of the name still looks like it would
+    """
+    names = [curtest['input'] for testcases in files.values() for curtest in testcases]
+    # The opening bracket of foo.[1x09-11] is optional
+    names.append("show.1x09-11].avi")
+
+    for cpattern in defaults['filename_patterns']:
+        hint = _PATTERN_HINTS[cpattern]
+        if hint is None:
+            continue
+        for name in names:
+            for variant in _without_hint(name, hint):
+                assert not re.match(cpattern, variant, re.VERBOSE), "%r matched pattern without containing %r:\n%s" % (
+                    variant, hint, cpattern)
+
+    # Parsing must find the same episodes as without the hints
+    assertEquals(FileParser("show.1x09-11].avi").parse().episodenumbers, [9, 10, 11])
+
+
 if __name__ == '__main__':
     import nose
     nose.main()
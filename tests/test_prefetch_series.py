@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""Tests looking up the series concurrently before processing the files
+"""
+
+import threading
+
+from tvnamer.config import Config
+from tvnamer.files import FileParser
+from tvnamer.main import prefetch_series
+from helpers import assertEquals
+
+
+class StubTvdb(object):
+    """Mimics how tvdb_api.Tvdb caches lookups: the series ID of a name is
+    stored in corrections before the show data is loaded into shows
+    """
+
+    series_ids = {"scrubs": 76156, "psych": 79335, "csi miami": 78310}
+
+    def __init__(self, failing=()):
+        self.corrections = {}
+        self.shows = {}
+        self.searches = []
+        self.failing = set(failing)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            self.searches.append(name)
+        if isinstance(name, int):
+            sid = name
+        else:
+            sid = self.series_ids[name.lower()]
+            self.corrections[name] = sid
+        self.shows[sid] = {}
+        if sid in self.failing or str(name).lower() in self.failing:
+            raise IOError("Connection reset while loading %s" % name)
+        self.shows[sid][1] = {1: "Episode"}
+        return self.shows[sid]
+
+
+def _episodes(*filenames):
+    return [FileParser(f).parse() for f in filenames]
+
+
+def _prefetch_config(monkeypatch):
+    monkeypatch.setitem(Config, "select_first", True)
+    monkeypatch.setitem(Config, "force_name", None)
+    monkeypatch.setitem(Config, "series_id", None)
+
+
+def test_prefetch_series(monkeypatch):
+    """Each series should be looked up once, ignoring the case of its name
+    """
+    _prefetch_config(monkeypatch)
+    tvdb = StubTvdb()
+
+    prefetch_series(tvdb, _episodes(
+        "scrubs.s01e01.avi", "Scrubs.s01e02.avi", "psych.s01e01.avi"))
+
+    assertEquals(sorted(tvdb.searches), ["psych", "scrubs"])
+    assertEquals(sorted(tvdb.corrections), ["psych", "scrubs"])
+    assertEquals(tvdb.shows[76156][1][1], "Episode")
+    assertEquals(tvdb.shows[79335][1][1], "Episode")
+
+
+def test_prefetch_series_by_id(monkeypatch):
+    """Series names replaced by a TVDB ID should be looked up by the ID
+    """
+    _prefetch_config(monkeypatch)
+    tvdb = StubTvdb()
+    episodes = _episodes("scrubs.s01e01.avi", "psych.s01e01.avi")
+    episodes[0].seriesname = 76156
+
+    prefetch_series(tvdb, episodes)
+
+    assertEquals(sorted(tvdb.searches, key=str), [76156, "psych"])
+    assertEquals(tvdb.shows[76156][1][1], "Episode")
+
+    tvdb = StubTvdb(failing=[76156])
+    prefetch_series(tvdb, episodes)
+    assert 76156 not in tvdb.shows
+
+
+def test_prefetch_series_failure_is_forgotten(monkeypatch):
+    """A lookup failing after the search should not leave an incomplete show
+    behind, so that process_file fetches it again and reports the real error
+    """
+    _prefetch_config(monkeypatch)
+    tvdb = StubTvdb(failing=["scrubs"])
+
+    prefetch_series(tvdb, _episodes("scrubs.s01e01.avi", "psych.s01e01.avi"))
+
+    assert "scrubs" not in tvdb.corrections
+    assert 76156 not in tvdb.shows
+    assertEquals(tvdb.shows[79335][1][1], "Episode")
+
+
+def test_prefetch_series_needs_select_first(monkeypatch):
+    """Nothing should be looked up when the user picks the series
+    """
+    _prefetch_config(monkeypatch)
+    monkeypatch.setitem(Config, "select_first", False)
+    tvdb = StubTvdb()
+
+    prefetch_series(tvdb, _episodes("scrubs.s01e01.avi", "psych.s01e01.avi"))
+
+    assertEquals(tvdb.searches, [])
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+"""Tests the skip_directories config option
+"""
+
+from functional_runner import run_tvnamer, verify_out_data
+from helpers import attr
+
+
+@attr("functional")
+def test_no_skip_directories():
+    """Tests empty list of directory patterns recurses into every directory
+    """
+
+    conf = """
+    {"always_rename": true,
+    "select_first": true,
+    "recursive": true,
+    "skip_directories": []}
+    """
+
+    out_data = run_tvnamer(
+        with_files = ['scrubs.s01e01.avi', 'testdir/scrubs.s01e02.avi'],
+        with_config = conf,
+        run_on_directory = True)
+
+    expected_files = [
+        'Scrubs - [01x01] - My First Day.avi',
+        'testdir/Scrubs - [01x02] - My Mentor.avi']
+
+    verify_out_data(out_data, expected_files)
+
+
+@attr("functional")
+def test_skip_directories_pattern():
+    """Tests directories matching a pattern are not descended into
+    """
+
+    conf = """
+    {"always_rename": true,
+    "select_first": true,
+    "recursive": true,
+    "skip_directories": ["@eaDir", "skip*"]}
+    """
+
+    out_data = run_tvnamer(
+        with_files = [
+            'scrubs.s01e01.avi',
+            '@eaDir/scrubs.s01e02.avi',
+            'skipme/scrubs.s01e03.avi',
+            'testdir/scrubs.s01e04.avi'],
+        with_config = conf,
+        run_on_directory = True)
+
+    expected_files = [
+        'Scrubs - [01x01] - My First Day.avi',
+        '@eaDir/scrubs.s01e02.avi',
+        'skipme/scrubs.s01e03.avi',
+        'testdir/Scrubs - [01x04] - My Old Lady.avi']
+
+    verify_out_data(out_data, expected_files)
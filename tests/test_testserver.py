@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""Tests that tvnamer._testserver runs are independent of each other, like
+separate subprocesses
+"""
+
+import logging
+
+from tvnamer._testserver import run_main
+from tvnamer.config import Config
+
+
+def test_log_output_in_every_run(tmp_path):
+    """Errors logged by main() should be part of the output of every run,
+    not only the first
+    """
+    config = tmp_path / "broken.json"
+    config.write_text("{broken")
+
+    for _ in range(2):
+        output, returncode = run_main(["-c", str(config), "scrubs.s01e01.avi"])
+        assert returncode == 1
+        assert "Error loading config" in output
+
+
+def test_verbose_does_not_leak(tmp_path):
+    """--verbose should not leave the root logger at DEBUG after the run
+    """
+    config = tmp_path / "broken.json"
+    config.write_text("{broken")
+    level = logging.getLogger().level
+
+    output, _ = run_main(["--verbose", "-c", str(config), "scrubs.s01e01.avi"])
+    assert "Loading config" in output
+    assert logging.getLogger().level == level
+
+    output, _ = run_main(["-c", str(config), "scrubs.s01e01.avi"])
+    assert "Loading config" not in output
+
+
+def test_warnings_in_every_run(tmp_path):
+    """Python warnings should be shown in every run, not once per process
+    """
+    config = tmp_path / "config.json"
+    config.write_text('{"lowercase_filename": true, "titlecase_filename": true}')
+
+    for _ in range(2):
+        output, _ = run_main(["-c", str(config), "--batch", "nothing.avi"])
+        assert "clobbers 'titlecase_filename'" in output
+    assert Config["lowercase_filename"] is False
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""Runs tvnamer repeatedly inside one interpreter, for the functional tests
+
+Started with:
+
+    python -m tvnamer._testserver
+
+Reads one JSON request per line from stdin, such as:
+
+    {"argv": ["--batch", "scrubs.s01e01.avi"], "stdin": ""}
+
+..runs tvnamer's main() with those arguments, and writes one JSON response
+per line to stdout:
+
+    {"output": "...", "returncode": 0}
+
+The global config, logging and warnings state are reset for every run, so
+requests do not affect each other. The server exits when its stdin is closed.
+"""
+
+import io
+import sys
+import copy
+import json
+import logging
+import warnings
+import traceback
+import contextlib
+
+import tvnamer.main
+from tvnamer.config import Config
+from tvnamer.config_defaults import defaults
+
+
+# main() updates the defaults and Config dicts in place, so keep a pristine
+# copy to restore before each run
+_initial_defaults = copy.deepcopy(defaults)
+
+
+def reset_config():
+    # type: () -> None
+    """Restores the global config to the defaults, undoing any changes made
+    by a previous run
+    """
+    defaults.clear()
+    defaults.update(copy.deepcopy(_initial_defaults))
+    Config.clear()
+    Config.update(copy.deepcopy(_initial_defaults))
+
+
+def _show_warning(message, category, filename, lineno, file=None, line=None):
+    # type: (...) -> None
+    """Prints warnings to sys.stderr like Python does by default, also when
+    the caller (e.g. pytest) records them instead
+    """
+    sys.stderr.write(warnings.formatwarning(message, category, filename, lineno, line))
+
+
+def run_main(argv, stdin=""):
+    # type: (list, str) -> tuple
+    """Calls tvnamer's main() with argv in the current process, emulating a
+    subprocess: stdin is used as standard input, stdout and stderr are captured
+    together, and SystemExit or uncaught exceptions become a return code.
+
+    Returns a tuple of the output and return code. The global config is
+    reset before and after the run, so nothing it loaded is left behind in
+    the calling process. Likewise the root logger starts without handlers
+    (so main()'s logging.basicConfig() logs to this run's output) and is
+    restored afterwards, and warnings are shown again in every run
+    """
+    reset_config()
+
+    output = io.StringIO()
+    old_argv, old_stdin = sys.argv, sys.stdin
+    root_logger = logging.getLogger()
+    old_handlers, old_level = root_logger.handlers[:], root_logger.level
+    sys.argv = ["tvnamer"] + argv
+    sys.stdin = io.StringIO(stdin)
+    root_logger.handlers = []
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output), \
+                warnings.catch_warnings():
+            warnings.simplefilter("default")
+            warnings.showwarning = _show_warning
+            try:
+                tvnamer.main.main()
+                returncode = 0
+            except SystemExit as e:
+                if e.code is None:
+                    returncode = 0
+                elif isinstance(e.code, int):
+                    returncode = e.code
+                else:
+                    # Like the interpreter, print non-integer exit values
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv, sys.stdin = old_argv, old_stdin
+        root_logger.handlers = old_handlers
+        root_logger.setLevel(old_level)
+        reset_config()
+
+    return output.getvalue(), returncode
+
+
+def serve(requests, responses):
+    # type: (io.TextIOBase, io.TextIOBase) -> None
+    """Handles requests (one JSON object per line) until EOF
+    """
+    for line in requests:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        output, returncode = run_main(request["argv"], request.get("stdin", ""))
+        responses.write(json.dumps({"output": output, "returncode": returncode}) + "\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    serve(sys.stdin, sys.stdout)
@@ -30,6 +30,7 @@ if typing.TYPE_CHECKING:
         'valid_extensions': List[str],
         'extension_pattern': str,
         'filename_blacklist': List[str],
+        'skip_directories': List[str],
         'windows_safe_filenames': bool,
         'normalize_unicode_filenames': bool,
         'lowercase_filename': bool,
@@ -127,6 +128,10 @@ defaults = {
     # [{"is_regex": true, "match": ".*sample.*"}, {"is_regex": false, "match": "sample"}]
     'filename_blacklist': [],
 
+    # When recursing, don't descend into directories with names matching any
+    # of these shell-style patterns, for example: ['@eaDir', '.git', '.Trash-*']
+    'skip_directories': [],
+
     # Force Windows safe filenames (always True on Windows)
     'windows_safe_filenames': False,
 
@@ -1,11 +1,9 @@
 import os
-import re
 import datetime
+import functools
 from abc import ABCMeta, abstractmethod
 from typing import Optional, Dict, List, Union, Tuple, Any
 
-import tvdb_api
-
 from tvnamer.config import Config
 from tvnamer.tvnamer_exceptions import (
     InvalidPath,
@@ -22,7 +20,7 @@ from tvnamer.utils import (
     format_episode_numbers,
     make_valid_filename,
     split_extension,
-    _apply_replacements, sizeof_fmt,  # FIXME
+    _apply_replacements, _compile, sizeof_fmt,  # FIXME
 )
 
 
@@ -46,12 +44,21 @@ def _apply_replacements_output(cfile):
     return _apply_replacements(cfile, Config['output_filename_replacements'])
 
 
+@functools.lru_cache(maxsize=1024)
+def _titlecase_filename(fname):
+    # type: (str) -> str
+    """Titlecases a filename, cached as the same name is usually generated
+    several times (preview, confirmation and rename)
+    """
+    from tvnamer._titlecase import titlecase
+    return titlecase(fname)
+
+
 def transform_filename(fname):
     # type: (str) -> str
 
     if Config['titlecase_filename']:
-        from tvnamer._titlecase import titlecase
-        fname = titlecase(fname)
+        fname = _titlecase_filename(fname)
 
     if Config['lowercase_filename']:
         fname = fname.lower()
@@ -87,7 +94,7 @@ def format_episode_name(names, join_with, multiep_format):
     all_numbers = [] # type: List[Optional[int]]
 
     for curname in names:
-        match = re.match(r"(.*) \(([0-9]+)\)$", curname)
+        match = _compile(r"(.*) \(([0-9]+)\)$").match(curname)
         if match is None:
             all_names.append(curname)
             all_numbers.append(None)
@@ -137,6 +144,25 @@ class BaseInfo(metaclass=ABCMeta):
     logic to generate new name for each type of name
     """
 
+    # Many of these are created when renaming a large batch of files, so
+    # avoid a per-instance __dict__
+    __slots__ = (
+        '_filesize_in_bytes',
+        '_filesize',
+        '_fullpath',
+        'filepath',
+        'filename',
+        'extension',
+        'originalfilename',
+        'seriesname',
+        'episodenumbers',
+        'episodename',
+        'extra',
+        'move_destination',
+        'renamer',
+        'new_name',
+    )
+
     def __init__(
             self,
             filename, # type: Optional[str]
@@ -145,8 +171,10 @@ class BaseInfo(metaclass=ABCMeta):
         ):
         # type: (...) -> None
 
-        self.filesize_in_bytes = os.path.getsize(filename)
-        self.filesize = sizeof_fmt(self.filesize_in_bytes)
+        # Looked up on first use, so parsing a filename does not need to
+        # stat the file
+        self._filesize_in_bytes = None # type: Optional[int]
+        self._filesize = None # type: Optional[str]
         self.fullpath = filename
 
         if filename is not None:
@@ -161,6 +189,14 @@ class BaseInfo(metaclass=ABCMeta):
             extra = {}
         self.extra = extra
 
+        # Set by tvnamer.main.get_move_destination, once the episode data
+        # is complete
+        self.move_destination = None # type: Optional[str]
+
+        # Set by tvnamer.main.process_file, reused when the files are moved
+        self.renamer = None # type: Optional[Any]
+        self.new_name = None # type: Optional[str]
+
     def fullpath_get(self):
         # type: () -> Optional[str]
         return self._fullpath
@@ -176,6 +212,30 @@ class BaseInfo(metaclass=ABCMeta):
 
     fullpath = property(fullpath_get, fullpath_set)
 
+    @property
+    def filesize_in_bytes(self):
+        # type: () -> int
+        if self._filesize_in_bytes is None:
+            self._filesize_in_bytes = os.path.getsize(self.fullpath)
+        return self._filesize_in_bytes
+
+    @filesize_in_bytes.setter
+    def filesize_in_bytes(self, value):
+        # type: (int) -> None
+        self._filesize_in_bytes = value
+
+    @property
+    def filesize(self):
+        # type: () -> str
+        if self._filesize is None:
+            self._filesize = sizeof_fmt(self.filesize_in_bytes)
+        return self._filesize
+
+    @filesize.setter
+    def filesize(self, value):
+        # type: (str) -> None
+        self._filesize = value
+
     @property
     def fullfilename(self):
         # type: () -> str
@@ -209,15 +269,16 @@ class BaseInfo(metaclass=ABCMeta):
         If the site is unreachable, it will warn the user. If the user aborts
         it will catch tvdb_api's user abort error and raise tvnamer's
         """
+        # Imported here as it is slow to import, and not needed for parsing
+        import tvdb_api
 
         # FIXME: MOve this into each subclass - too much hasattr/isinstance
         try:
             if series_id is None:
                 show = tvdb_instance[force_name or self.seriesname]
             else:
-                series_id = int(series_id)
-                tvdb_instance._getShowData(series_id, Config['language'])
-                show = tvdb_instance[series_id]
+                # Only fetches the show data the first time the ID is used
+                show = tvdb_instance[int(series_id)]
         except tvdb_api.tvdb_error as errormsg:
             raise DataRetrievalError("Error with www.thetvdb.com: %s" % errormsg)
         except tvdb_api.tvdb_shownotfound:
@@ -312,8 +373,7 @@ class BaseInfo(metaclass=ABCMeta):
         original_epdata = self.getepdata()
 
         # Add in extra dict keys, without clobbering existing values from getepdata()
-        epdata = {} # type: Dict[str, Optional[str]]
-        epdata.update(self.extra.copy())
+        epdata = dict(self.extra) # type: Dict[str, Optional[str]]
         epdata.update(original_epdata)
 
         if self.episodename is None:
@@ -349,6 +409,7 @@ class BaseInfo(metaclass=ABCMeta):
 
 
 class EpisodeInfo(BaseInfo):
+    __slots__ = ('seasonnumber',)
 
     def __init__(
         self,
@@ -425,6 +486,8 @@ class EpisodeInfo(BaseInfo):
 
 
 class DatedEpisodeInfo(BaseInfo):
+    __slots__ = ()
+
     def __init__(
         self,
         seriesname,  # type: str
@@ -494,6 +557,8 @@ class DatedEpisodeInfo(BaseInfo):
 
 
 class NoSeasonEpisodeInfo(BaseInfo):
+    __slots__ = ()
+
     CFG_KEY_WITH_EP = "filename_with_episode_no_season"
     CFG_KEY_WITHOUT_EP = "filename_without_episode_no_season"
 
@@ -552,6 +617,8 @@ class NoSeasonEpisodeInfo(BaseInfo):
 
 
 class AnimeEpisodeInfo(NoSeasonEpisodeInfo):
+    __slots__ = ()
+
     CFG_KEY_WITH_EP = "filename_anime_with_episode"
     CFG_KEY_WITHOUT_EP = "filename_anime_without_episode"
 
@@ -579,8 +646,7 @@ class AnimeEpisodeInfo(NoSeasonEpisodeInfo):
         orig_epdata = self.getepdata()
 
         # Add in extra dict keys, without clobbering existing values in epdata
-        epdata = {} # type: Dict[str, Optional[str]]
-        epdata.update(self.extra.copy())
+        epdata = dict(self.extra) # type: Dict[str, Optional[str]]
         epdata.update(orig_epdata)
 
         if self.episodename is not None:
@@ -2,12 +2,15 @@ import os
 import re
 import errno
 import shutil
+import fnmatch
 import logging
 import datetime
-from typing import List, Pattern, Optional
+import functools
+from typing import Any, Dict, List, Pattern, Optional, Tuple
 
 from tvnamer.config import Config
-from tvnamer.utils import _apply_replacements, warn, split_extension
+from tvnamer.config_defaults import defaults
+from tvnamer.utils import _apply_replacements, _compile, warn, split_extension
 from tvnamer.data import BaseInfo, EpisodeInfo, DatedEpisodeInfo, AnimeEpisodeInfo, NoSeasonEpisodeInfo
 from tvnamer.tvnamer_exceptions import ConfigValueError, InvalidFilename, InvalidPath
 
@@ -15,6 +18,36 @@ from tvnamer.tvnamer_exceptions import ConfigValueError, InvalidFilename, Invali
 LOG = logging.getLogger(__name__)
 
 
+# A lowercase substring a filename must contain for each of the default
+# filename_patterns to possibly match. It is checked before running the
+# (comparatively slow) regex, so most patterns are skipped without being
+# tried. Patterns not in this table (e.g. from a user's config) always run.
+_PATTERN_HINTS = dict(zip(defaults['filename_patterns'], [
+    '[',        # [group] Show - 01-02 [crc]
+    '[',        # [group] Show - 01 [crc]
+    'e',        # foo s01e23 s01e24 s01e25 *
+    'e',        # foo.s01e23e24*
+    'x',        # foo.1x23 1x24 1x25
+    'x',        # foo.1x23x24*
+    '-',        # foo.s01e23-24*
+    'x',        # foo.1x23-24*
+    'x',        # foo.[1x09-11]* (the [ is optional, see \[ ? in the pattern)
+    '[',        # foo - [012]
+    's',        # foo.s0101, foo.0201
+    'x',        # foo.1x09*
+    's',        # foo.s01.e01, foo.s01_e01, "foo.s01 - e01"
+    None,       # foo.2010.01.02.etc
+    '[',        # foo - [01.09]
+    's',        # Foo - S2 E 02 - etc
+    'episode',  # Show - Episode 9999 [S 12 - Ep 131] - etc
+    'of',       # show name 2 of 6 - blah
+    None,       # Show.Name.Part.1.and.Part.2
+    'part ',    # Show.Name.Part1
+    'season',   # show name Season 01 Episode 20
+    'e',        # show.name.e123.abc
+]))
+
+
 def _apply_replacements_input(cfile):
     # type: (str) -> str
     """Applies custom input filename replacements, wraps _apply_replacements
@@ -39,11 +72,15 @@ def _replace_input_series_name(seriesname):
     This helps the TVDB query get the right match.
     """
     for pat, replacement in Config['input_series_replacements'].items():
-        if re.match(pat, seriesname, re.IGNORECASE | re.UNICODE):
+        if _compile(pat, re.IGNORECASE | re.UNICODE).match(seriesname):
             return replacement
     return seriesname
 
 
+# intepret_year's guess for every year below 1000
+_YEAR_TABLE = tuple(2000 + year if year < 50 else 1900 + year for year in range(1000))
+
+
 def intepret_year(value):
     # type: (str) -> int
     """Handle two-digit years with heuristic-ish guessing
@@ -60,10 +97,7 @@ def intepret_year(value):
     if year > 999:
         return year
 
-    if year < 50:
-        return 2000 + year
-    else:
-        return 1900 + year
+    return _YEAR_TABLE[year]
 
 
 def _clean_extracted_series_name(seriesname):
@@ -80,11 +114,11 @@ def _clean_extracted_series_name(seriesname):
     'an example 1.0 test'
     """
     # TODO: Could this be made to clean "Hawaii.Five-0.2010" into "Hawaii Five-0 2010"?
-    seriesname = re.sub(r"(\D)[.](\D)", "\\1 \\2", seriesname)
-    seriesname = re.sub(r"(\D)[.]", "\\1 ", seriesname)
-    seriesname = re.sub(r"[.](\D)", " \\1", seriesname)
+    seriesname = _compile(r"(\D)[.](\D)").sub("\\1 \\2", seriesname)
+    seriesname = _compile(r"(\D)[.]").sub("\\1 ", seriesname)
+    seriesname = _compile(r"[.](\D)").sub(" \\1", seriesname)
     seriesname = seriesname.replace("_", " ")
-    seriesname = re.sub("-$", "", seriesname)
+    seriesname = _compile("-$").sub("", seriesname)
     return seriesname.strip()
 
 
@@ -101,22 +135,37 @@ class FileFinder(object):
     the filename (minus the extension). If a match is found, the file is skipped
     (e.g. for filtering out "sample" files). If [] or None is supplied, no
     filtering is done
+
+    The skip_directories argument is a list of shell-style patterns (as used by
+    fnmatch). When recursing, directories with a matching name are not
+    descended into.
     """
 
     def __init__(
-        self, path, with_extension=None, filename_blacklist=None, recursive=False
+        self,
+        path,
+        with_extension=None,
+        filename_blacklist=None,
+        recursive=False,
+        skip_directories=None,
     ):
-        # type: (str, Optional[List[str]], Optional[List[str]], bool) -> None
+        # type: (str, Optional[List[str]], Optional[List[str]], bool, Optional[List[str]]) -> None
         self.path = path
         if with_extension is None:
             self.with_extension = [] # type: List[str]
         else:
             self.with_extension = with_extension
+        # Dotted form of with_extension, for checking each file found
+        self._extensions = frozenset(".%s" % cext for cext in self.with_extension)
         if filename_blacklist is None:
             self.with_blacklist = []
         else:
             self.with_blacklist = filename_blacklist
         self.recursive = recursive
+        if skip_directories is None:
+            self.skip_directories = [] # type: List[str]
+        else:
+            self.skip_directories = skip_directories
 
     def find_files(self):
         # type: () -> List[str]
@@ -142,12 +191,7 @@ class FileFinder(object):
 
         # don't use split_extension here (otherwise valid_extensions is useless)!
         _, extension = os.path.splitext(fname)
-        for cext in self.with_extension:
-            cext = ".%s" % cext
-            if extension == cext:
-                return True
-        else:
-            return False
+        return extension in self._extensions
 
     def _blacklisted_filename(self, filepath):
         # type: (str) -> bool
@@ -197,7 +241,7 @@ class FileFinder(object):
                     to_check = fullname
 
             if fblacklist.get("is_regex", False):
-                m = re.match(fblacklist["match"], to_check)
+                m = _compile(fblacklist["match"]).match(to_check)
                 if m is not None:
                     return True
             else:
@@ -207,6 +251,16 @@ class FileFinder(object):
         else:
             return False
 
+    def _skipped_directory(self, dirname):
+        # type: (str) -> bool
+        """Checks if the directory name matches skip_directories
+        """
+        for pattern in self.skip_directories:
+            if fnmatch.fnmatch(dirname, pattern):
+                return True
+        else:
+            return False
+
     def _find_files_in_path(self, startpath):
         # type: (str) -> List[str]
         """Finds files from startpath, could be called recursively
@@ -216,10 +270,15 @@ class FileFinder(object):
             LOG.info("Skipping inaccessible path %s" % startpath)
             return allfiles
 
-        for subf in os.listdir(startpath):
-            newpath = os.path.join(startpath, subf)
-            newpath = os.path.abspath(newpath)
-            if os.path.isfile(newpath):
+        # scandir gives the file type with each entry, so usually no
+        # separate stat is needed per file
+        with os.scandir(startpath) as entries:
+            entries = list(entries)
+
+        for entry in entries:
+            subf = entry.name
+            newpath = os.path.abspath(entry.path)
+            if entry.is_file():
                 if not self._check_extension(subf):
                     continue
                 elif self._blacklisted_filename(subf):
@@ -227,7 +286,7 @@ class FileFinder(object):
                 else:
                     allfiles.append(newpath)
             else:
-                if self.recursive:
+                if self.recursive and not self._skipped_directory(subf):
                     allfiles.extend(self._find_files_in_path(newpath))
                 # end if recursive
             # end if isfile
@@ -235,6 +294,156 @@ class FileFinder(object):
         return allfiles
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_patterns(patterns):
+    # type: (Tuple[str, ...]) -> Tuple[Tuple[Pattern, ...], Tuple[str, ...]]
+    """Compiles the given filename_patterns, skipping invalid ones.
+
+    Returns a tuple of the compiled patterns and the warnings about invalid
+    ones. The result is cached, so the caller shows the warnings (every time,
+    not only the first)
+    """
+    compiled = []
+    warnings = []
+    for cpattern in patterns:
+        try:
+            cregex = _compile(cpattern, re.VERBOSE)
+        except re.error as errormsg:
+            warnings.append(
+                "WARNING: Invalid episode_pattern (error: %s)\nPattern:\n%s"
+                % (errormsg, cpattern)
+            )
+        else:
+            compiled.append(cregex)
+    return tuple(compiled), tuple(warnings)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_filename(filename, patterns):
+    # type: (str, Tuple[str, ...]) -> Optional[Tuple[type, Dict[str, Any], Optional[str]]]
+    """Matches a filename (with input replacements already applied) against
+    the filename_patterns, and extracts the series name, numbers and extra
+    groups.
+
+    Returns a tuple of the BaseInfo subclass to create, its keyword arguments
+    and a warning for the caller to show (or None), or None if no pattern
+    matches. The result is cached, so the caller must not modify it.
+    """
+    lowered = filename.lower()
+    warning = None # type: Optional[str]
+
+    for cmatcher in _compile_patterns(patterns)[0]:
+        hint = _PATTERN_HINTS.get(cmatcher.pattern)
+        if hint is not None and hint not in lowered:
+            continue
+
+        match = cmatcher.match(filename)
+        if match:
+            namedgroups = match.groupdict().keys()
+
+            if 'episodenumber1' in namedgroups:
+                # Multiple episodes, have episodenumber1 or 2 etc
+                epnos = []
+                for cur in namedgroups:
+                    epnomatch = _compile(r'episodenumber(\d+)').match(cur)
+                    if epnomatch:
+                        epnos.append(int(match.group(cur)))
+                epnos.sort()
+                episodenumbers = epnos # type: List[int]
+
+            elif 'episodenumberstart' in namedgroups:
+                # Multiple episodes, regex specifies start and end number
+                start = int(match.group('episodenumberstart'))
+                end = int(match.group('episodenumberend'))
+                if end - start > 5:
+                    warning = (
+                        "WARNING: %s episodes detected in file: %s, confused by numeric episode name, using first match: %s"
+                        % (end - start, filename, start)
+                    )
+                    episodenumbers = [start]
+                elif start > end:
+                    # Swap start and end
+                    start, end = end, start
+                    episodenumbers = list(range(start, end + 1))
+                else:
+                    episodenumbers = list(range(start, end + 1))
+
+            elif 'episodenumber' in namedgroups:
+                episodenumbers = [
+                    int(match.group('episodenumber')),
+                ]
+
+            elif (
+                'year' in namedgroups
+                or 'month' in namedgroups
+                or 'day' in namedgroups
+            ):
+                if not all(
+                    [
+                        'year' in namedgroups,
+                        'month' in namedgroups,
+                        'day' in namedgroups,
+                    ]
+                ):
+                    raise ConfigValueError(
+                        "Date-based regex must contain groups 'year', 'month' and 'day'"
+                    )
+                match.group('year')
+
+                year = intepret_year(match.group('year'))
+
+                episodedates = [
+                    datetime.date(
+                        year, int(match.group('month')), int(match.group('day'))
+                    )
+                ]
+
+            else:
+                raise ConfigValueError(
+                    "Regex does not contain episode number group, should"
+                    "contain episodenumber, episodenumber1-9, or"
+                    "episodenumberstart and episodenumberend\n\nPattern"
+                    "was:\n" + cmatcher.pattern
+                )
+
+            if 'seriesname' in namedgroups:
+                seriesname = match.group('seriesname')
+            else:
+                raise ConfigValueError(
+                    "Regex must contain seriesname. Pattern was:\n"
+                    + cmatcher.pattern
+                )
+
+            if seriesname is not None:
+                seriesname = _clean_extracted_series_name(seriesname)
+
+            values = {
+                'seriesname': seriesname,
+                'extra': match.groupdict(),
+            } # type: Dict[str, Any]
+
+            if 'seasonnumber' in namedgroups:
+                values['seasonnumber'] = int(match.group('seasonnumber'))
+                values['episodenumbers'] = episodenumbers
+                return EpisodeInfo, values, warning
+            elif (
+                'year' in namedgroups
+                and 'month' in namedgroups
+                and 'day' in namedgroups
+            ):
+                values['episodenumbers'] = episodedates # FIXME: Refactor so this is defined closer to here, prone to name not defined error
+                return DatedEpisodeInfo, values, warning
+            elif 'group' in namedgroups:
+                values['episodenumbers'] = episodenumbers
+                return AnimeEpisodeInfo, values, warning
+            else:
+                # No season number specified, usually for Anime
+                values['episodenumbers'] = episodenumbers
+                return NoSeasonEpisodeInfo, values, warning
+
+    return None
+
+
 class FileParser(object):
     """Deals with parsing of filenames
     """
@@ -242,24 +451,23 @@ class FileParser(object):
     def __init__(self, path):
         # type: (str) -> None
         self.path = path
+        # The configured patterns, read once. They are the key of the cached
+        # _compile_patterns and _parse_filename (strings hash much faster
+        # than compiled patterns)
+        self._patterns = tuple(Config['filename_patterns'])
+        # Not used for parsing, only kept for compatibility
         self.compiled_regexs = [] # type: List[Pattern]
         self._compile_regexs()
 
     def _compile_regexs(self):
         # type: () -> None
         """Takes episode_patterns from config, compiles them all
-        into self.compiled_regexs
+        into self.compiled_regexs, warning about invalid ones
         """
-        for cpattern in Config['filename_patterns']:
-            try:
-                cregex = re.compile(cpattern, re.VERBOSE)
-            except re.error as errormsg:
-                warn(
-                    "WARNING: Invalid episode_pattern (error: %s)\nPattern:\n%s"
-                    % (errormsg, cpattern)
-                )
-            else:
-                self.compiled_regexs.append(cregex)
+        compiled, warnings = _compile_patterns(self._patterns)
+        for warning in warnings:
+            warn(warning)
+        self.compiled_regexs.extend(compiled)
 
     def parse(self):
         # type: () -> BaseInfo
@@ -270,138 +478,47 @@ class FileParser(object):
 
         filename = _apply_replacements_input(filename)
 
-        for cmatcher in self.compiled_regexs:
-            match = cmatcher.match(filename)
-            if match:
-                namedgroups = match.groupdict().keys()
-
-                if 'episodenumber1' in namedgroups:
-                    # Multiple episodes, have episodenumber1 or 2 etc
-                    epnos = []
-                    for cur in namedgroups:
-                        epnomatch = re.match(r'episodenumber(\d+)', cur)
-                        if epnomatch:
-                            epnos.append(int(match.group(cur)))
-                    epnos.sort()
-                    episodenumbers = epnos # type: List[int]
-
-                elif 'episodenumberstart' in namedgroups:
-                    # Multiple episodes, regex specifies start and end number
-                    start = int(match.group('episodenumberstart'))
-                    end = int(match.group('episodenumberend'))
-                    if end - start > 5:
-                        warn(
-                            "WARNING: %s episodes detected in file: %s, confused by numeric episode name, using first match: %s"
-                            % (end - start, filename, start)
-                        )
-                        episodenumbers = [start]
-                    elif start > end:
-                        # Swap start and end
-                        start, end = end, start
-                        episodenumbers = list(range(start, end + 1))
-                    else:
-                        episodenumbers = list(range(start, end + 1))
-
-                elif 'episodenumber' in namedgroups:
-                    episodenumbers = [
-                        int(match.group('episodenumber')),
-                    ]
-
-                elif (
-                    'year' in namedgroups
-                    or 'month' in namedgroups
-                    or 'day' in namedgroups
-                ):
-                    if not all(
-                        [
-                            'year' in namedgroups,
-                            'month' in namedgroups,
-                            'day' in namedgroups,
-                        ]
-                    ):
-                        raise ConfigValueError(
-                            "Date-based regex must contain groups 'year', 'month' and 'day'"
-                        )
-                    match.group('year')
-
-                    year = intepret_year(match.group('year'))
-
-                    episodedates = [
-                        datetime.date(
-                            year, int(match.group('month')), int(match.group('day'))
-                        )
-                    ]
-
-                else:
-                    raise ConfigValueError(
-                        "Regex does not contain episode number group, should"
-                        "contain episodenumber, episodenumber1-9, or"
-                        "episodenumberstart and episodenumberend\n\nPattern"
-                        "was:\n" + cmatcher.pattern
-                    )
-
-                if 'seriesname' in namedgroups:
-                    seriesname = match.group('seriesname')
-                else:
-                    raise ConfigValueError(
-                        "Regex must contain seriesname. Pattern was:\n"
-                        + cmatcher.pattern
-                    )
-
-                if seriesname is not None:
-                    seriesname = _clean_extracted_series_name(seriesname)
-                    seriesname = _replace_input_series_name(seriesname)
-
-                extra_values = match.groupdict()
-
-                if 'seasonnumber' in namedgroups:
-                    seasonnumber = int(match.group('seasonnumber'))
-
-                    episode = EpisodeInfo(
-                        seriesname=seriesname,
-                        seasonnumber=seasonnumber,
-                        episodenumbers=episodenumbers,
-                        filename=self.path,
-                        extra=extra_values,
-                    ) # type: BaseInfo
-                elif (
-                    'year' in namedgroups
-                    and 'month' in namedgroups
-                    and 'day' in namedgroups
-                ):
-                    episode = DatedEpisodeInfo(
-                        seriesname=seriesname,
-                        episodenumbers=episodedates, # FIXME: Refactor so this is defined closer to here, prone to name not defined error
-                        filename=self.path,
-                        extra=extra_values,
-                    )
-                elif 'group' in namedgroups:
-                    episode = AnimeEpisodeInfo(
-                        seriesname=seriesname,
-                        episodenumbers=episodenumbers,
-                        filename=self.path,
-                        extra=extra_values,
-                    )
-                else:
-                    # No season number specified, usually for Anime
-                    episode = NoSeasonEpisodeInfo(
-                        seriesname=seriesname,
-                        episodenumbers=episodenumbers,
-                        filename=self.path,
-                        extra=extra_values,
-                    )
-
-                return episode
-        else:
+        parsed = _parse_filename(filename, self._patterns)
+        if parsed is None:
             emsg = "Cannot parse %r" % self.path
             if len(Config['input_filename_replacements']) > 0:
                 emsg += " with replacements: %r" % filename
             raise InvalidFilename(emsg)
 
+        info_class, values, warning = parsed
+        if warning is not None:
+            warn(warning)
+
+        # The parsed values are shared with the cache, so give the new
+        # episode its own copies of the mutable ones
+        seriesname = values['seriesname']
+        if seriesname is not None:
+            seriesname = _replace_input_series_name(seriesname)
+
+        kwargs = dict(values)
+        kwargs['seriesname'] = seriesname
+        kwargs['episodenumbers'] = list(values['episodenumbers'])
+        kwargs['extra'] = dict(values['extra'])
+
+        return info_class(filename=self.path, **kwargs)
+
 
 def rename_file(old, new):
     # type: (str, str) -> None
     # print("rename %s to %s" % (old, new))
+
+    # On the same filesystem a plain rename is enough, and keeps the file's
+    # times. Moving into a directory and moving across filesystems is left
+    # to shutil.move
+    if not os.path.isdir(new):
+        try:
+            os.replace(old, new)
+        except OSError as ex:
+            if ex.errno != errno.EXDEV:
+                raise
+        else:
+            return
+
     stat = os.stat(old)
     shutil.move(old, new)
     try:
@@ -490,7 +607,8 @@ class Renamer(object):
         if get_path_preview:
             return new_fullpath
 
-        if not os.path.exists(new_dir):
+        # Renaming within the file's own directory needs no directory check
+        if new_dir != old_dir and not os.path.exists(new_dir):
             os.makedirs(new_dir, exist_ok=True)
             print("Created directory %s" % new_dir)
 
@@ -6,8 +6,7 @@
 import os
 
 import sys
-# noinspection PyUnresolvedReferences
-from time import sleep, time
+from time import time
 
 sys.path.append('../tvnamer')
 
@@ -20,9 +19,22 @@ except ImportError:
     pass
 
 import json
+import builtins
+import collections
+import concurrent.futures
 
-import tvdb_api
-from typing import List, Optional
+try:
+    # Faster JSON parsing for config files, if installed
+    import orjson
+except ImportError:
+    orjson = None
+
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import tvdb_api
+    from rich.layout import Layout
+    from rich.table import Table
 
 from tvnamer import cliarg_parser, __version__
 from tvnamer.config_defaults import defaults
@@ -53,17 +65,8 @@ from tvnamer.tvnamer_exceptions import (
     DataRetrievalError,
 )
 
-from rich import print
-from rich.table import Table
-from rich import box
-from rich.panel import Panel
-from rich.layout import Layout
-from rich.live import Live
-from rich.progress import TimeElapsedColumn
-from rich.progress import Progress, BarColumn, TextColumn
-from rich.text import Text
-
-import keyboard
+# rich and tvdb_api take a large part of the startup time, so they are only
+# imported where needed (--version and --preview-config do not use rich)
 
 LOG = logging.getLogger(__name__)
 
@@ -74,12 +77,26 @@ TVNAMER_API_KEY = "fb51f9b848ffac9750bada89ecba0225"
 MSG_COLOR = "white"
 MSG_COLOR_PATH = "cyan"
 
+# Maximale Anzahl Episoden-Zeilen in der Tabelle, aeltere Zeilen werden
+# entfernt (jede Zeile wird bei jedem Refresh der Live-Anzeige neu gerendert)
+TABLE_MAX_ROWS = 50
+
+# Parsed config files by path and modification time, so running main()
+# several times in one process (e.g. tvnamer._testserver) parses them once
+_loaded_configs = {} # type: Dict[Tuple[str, int], Dict[str, Any]]
+
+
+def print(*args, **kwargs):
+    # type: (*Any, **Any) -> None
+    """rich's print, imported on first use
+    """
+    from rich import print as rich_print
+    rich_print(*args, **kwargs)
+
 
 def truncate_string(str_input, max_length):
-    str_end = '...'
-    length = len(str_input)
-    if length > max_length:
-        return str_input[:max_length - len(str_end)] + str_end
+    if len(str_input) > max_length:
+        return str_input[:max_length - 3] + '...'
 
     return str_input
 
@@ -87,7 +104,12 @@ def truncate_string(str_input, max_length):
 def get_move_destination(episode):
     # type: (BaseInfo) -> str
     """Constructs the location to move/copy the file
+
+    The result is stored on the episode and reused, as this is called several
+    times per file (table, preview and the move itself)
     """
+    if episode.move_destination is not None:
+        return episode.move_destination
 
     # TODO: Write functional test to ensure this valid'ifying works
     def wrap_validfname(fname):
@@ -122,7 +144,8 @@ def get_move_destination(episode):
             "originalfilename": episode.originalfilename,
         }
     elif isinstance(episode, EpisodeInfo):
-        dest_dir = Config["move_files_destination"] % {
+        # Same values for the destination and alternative destination
+        dest_values = {
             "seriesname": wrap_validfname(episode.seriesname),
             "seasonnumber": episode.seasonnumber,
             "episodenumbers": wrap_validfname(
@@ -130,16 +153,10 @@ def get_move_destination(episode):
             ),
             "originalfilename": episode.originalfilename,
         }
+        dest_dir = Config["move_files_destination"] % dest_values
 
         if "move_files_destination_alt" in Config:
-            dest_dir_alt = Config["move_files_destination_alt"] % {
-                "seriesname": wrap_validfname(episode.seriesname),
-                "seasonnumber": episode.seasonnumber,
-                "episodenumbers": wrap_validfname(
-                    format_episode_numbers(episode.episodenumbers)
-                ),
-                "originalfilename": episode.originalfilename,
-            }
+            dest_dir_alt = Config["move_files_destination_alt"] % dest_values
         else:
             dest_dir_alt = None
 
@@ -158,6 +175,7 @@ def get_move_destination(episode):
     else:
         raise RuntimeError("Unhandled episode subtype of %s" % type(episode))
 
+    episode.move_destination = dest_dir
     return dest_dir
 
 
@@ -239,9 +257,11 @@ def confirm(question, options, default="y"):
             options_chunks.append(x)
     options_str = "/".join(options_chunks)
 
+    # Printed in one go, as each print is a separate render by rich
+    prompt = "%s\n(%s) " % (question, options_str)
+
     while True:
-        print(question)
-        print("(%s) " % options_str, end="")
+        print(prompt, end="")
         try:
             ans = input().strip()
         except KeyboardInterrupt as errormsg:
@@ -254,21 +274,29 @@ def confirm(question, options, default="y"):
             return default
 
 
-def do_delete_path(episode, ispreview=False, msg_table=None):
+def _has_single_entry(path):
+    # type: (str) -> bool
+    """Checks if the directory contains exactly one entry, without listing
+    all of it
+    """
+    with os.scandir(path) as entries:
+        return next(entries, None) is not None and next(entries, None) is None
+
 
-    count = len(os.listdir(episode.filepath))
+def do_delete_path(episode, ispreview=False, msg_table=None):
 
     try:
-        if os.path.exists(episode.filepath) and not(os.path.isfile(episode.fullpath)):
+        is_file = os.path.isfile(episode.fullpath)
+        if not is_file and os.path.exists(episode.filepath):
             # print("Deleting %s" % episode.filepath)
             if not ispreview:
                 os.removedirs(episode.filepath)
             return True
-        elif count == 1 and ispreview:
+        elif ispreview and _has_single_entry(episode.filepath):
             #print("Path will be deleted: %s" % episode.filepath)
 
             return True
-        elif os.path.isfile(episode.fullpath):
+        elif is_file:
             #warn("File %s already exists!" % episode.filepath)
             return False
         else:
@@ -279,7 +307,7 @@ def do_delete_path(episode, ispreview=False, msg_table=None):
         return False
 
 def process_file(tvdb_instance, episode, table):
-    # type: (tvdb_api.Tvdb, BaseInfo, Table) -> None
+    # type: (tvdb_api.Tvdb, BaseInfo, EpisodeTable) -> None
     """Gets episode name, prompts user for input
     """
 
@@ -321,6 +349,7 @@ def process_file(tvdb_instance, episode, table):
         warn("%s" % errormsg)
 
     cnamer = Renamer(episode.fullpath)
+    episode.renamer = cnamer
 
     should_rename = False
 
@@ -331,12 +360,13 @@ def process_file(tvdb_instance, episode, table):
 
     else:
         new_name = episode.generate_filename()
+        episode.new_name = new_name
         if new_name == episode.fullfilename:
             #print("#" * 20)
             #print("Existing filename is correct: %s" % episode.fullfilename)
             #print("#" * 20)
-            table.add_row(episode.fullfilename, truncate_string(new_name, 40),
-                          truncate_string(get_move_destination(episode), 55), episode.filesize)
+            table.add_episode_row(episode.fullfilename, truncate_string(new_name, 40),
+                                  truncate_string(get_move_destination(episode), 55), episode.filesize)
             should_rename = True
 
         else:
@@ -351,8 +381,8 @@ def process_file(tvdb_instance, episode, table):
                 )
 
             #print(f"{episode.fullfilename} => {new_name}")
-            table.add_row(episode.fullfilename, truncate_string(new_name, 40),
-                          truncate_string(get_move_destination(episode), 55), episode.filesize)
+            table.add_episode_row(episode.fullfilename, truncate_string(new_name, 40),
+                                  truncate_string(get_move_destination(episode), 55), episode.filesize)
 
             if Config["dry_run"]:
                 # print("%s will be renamed to %s" % (episode.fullfilename, new_name))
@@ -400,12 +430,14 @@ def process_file(tvdb_instance, episode, table):
             #print("%s will be moved to %s" % (new_name, get_move_destination(episode)))
             return
 
-        if Config["move_files_destination_is_filepath"]:
-            do_move_file(cnamer=cnamer, dest_filepath=new_path, get_path_preview=True)
-        else:
-            do_move_file(cnamer=cnamer, dest_dir=new_path, get_path_preview=True)
-
         if not Config["batch"] and Config["move_files_confirmation"]:
+            # The preview is only needed when asking, it repeats the
+            # destination setup done by the actual move
+            if Config["move_files_destination_is_filepath"]:
+                do_move_file(cnamer=cnamer, dest_filepath=new_path, get_path_preview=True)
+            else:
+                do_move_file(cnamer=cnamer, dest_dir=new_path, get_path_preview=True)
+
             ans = confirm("Move file?", options=["y", "n", "q"], default="y")
         else:
             ans = "y"
@@ -418,6 +450,62 @@ def process_file(tvdb_instance, episode, table):
             raise UserAbort("user exited with q")
 
 
+def prefetch_series(tvdb_instance, episodes):
+    # type: (tvdb_api.Tvdb, List[BaseInfo]) -> None
+    """Looks up the distinct series of the episodes concurrently, so that
+    process_file finds the show data already loaded instead of waiting for
+    each show in turn.
+
+    Only done when the first search result is selected automatically, as
+    choosing a series interactively has to happen one at a time. Errors are
+    not reported here: whatever a failed lookup left behind is discarded, so
+    process_file looks the series up again and reports the actual error.
+    """
+    if not Config["select_first"]:
+        return
+    if Config["force_name"] is not None or Config["series_id"] is not None:
+        # Every episode uses the same series
+        return
+
+    # The TVDB search ignores case, so "scrubs" and "Scrubs" are the same
+    # series and only one of them is fetched. input_series_replacements can
+    # also turn the name into a series ID
+    seriesnames = {} # type: Dict[Any, Any]
+    for e in episodes:
+        if isinstance(e.seriesname, str):
+            seriesnames.setdefault(e.seriesname.lower(), e.seriesname)
+        elif e.seriesname is not None:
+            seriesnames.setdefault(e.seriesname, e.seriesname)
+    if len(seriesnames) < 2:
+        return
+
+    def fetch(seriesname):
+        # type: (Any) -> bool
+        try:
+            tvdb_instance[seriesname]
+        except Exception as e:
+            LOG.debug("Prefetching series %r failed: %s" % (seriesname, e))
+            return False
+        return True
+
+    names = list(seriesnames.values())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(names))) as executor:
+        results = list(executor.map(fetch, names))
+
+    # tvdb_api remembers the series ID of a name before loading the show data,
+    # so a lookup failing part way through would leave an incomplete show that
+    # is used without fetching it again. Forget about it instead (done after
+    # all lookups finished, as another name may map to the same series ID)
+    for seriesname, fetched in zip(names, results):
+        if not fetched:
+            if isinstance(seriesname, int):
+                sid = seriesname # type: Optional[int]
+            else:
+                sid = tvdb_instance.corrections.pop(seriesname, None)
+            if sid is not None:
+                tvdb_instance.shows.pop(sid, None)
+
+
 def find_files(paths):
     # type: (List[str]) -> List[str]
     """
@@ -431,6 +519,7 @@ def find_files(paths):
             with_extension=Config["valid_extensions"],
             filename_blacklist=Config["filename_blacklist"],
             recursive=Config["recursive"],
+            skip_directories=Config["skip_directories"],
         )
 
         try:
@@ -441,8 +530,9 @@ def find_files(paths):
     if len(valid_files) == 0:
         raise NoValidFilesFoundError()
 
-    # Remove duplicate files (all paths from FileFinder are absolute)
-    valid_files = list(set(valid_files))
+    # Remove duplicate files (all paths from FileFinder are absolute),
+    # keeping the order they were found in
+    valid_files = list(dict.fromkeys(valid_files))
 
     return valid_files
 
@@ -452,6 +542,10 @@ def create_info_grid(paths, count_files, header_info):
     """
     Kopfzeile mit Pfad(en) und Anzahl gefundener Episoden erzeugen und anzeigen
     """
+    from rich import box
+    from rich.panel import Panel
+    from rich.table import Table
+
     info_grid = Table.grid(expand=True)
     info_grid.add_column(justify="left", ratio=3)
     info_grid.add_column(justify="right")
@@ -462,16 +556,36 @@ def create_info_grid(paths, count_files, header_info):
     header_info.update(Panel(info_grid, style="cyan", box=box.ROUNDED))
 
 
+def get_cache_dir():
+    # type: () -> Optional[str]
+    """Returns the directory for the persistent TVDB response cache
+    (~/.cache/tvnamer), or None if it cannot be created
+    """
+    cache_dir = os.path.expanduser("~/.cache/tvnamer")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        LOG.debug("Could not create cache directory %s: %s" % (cache_dir, e))
+        return None
+    return cache_dir
+
+
 def tvnamer(paths):
     # type: (List[str]) -> None
     """Main tvnamer function, takes an array of paths, does stuff.
     """
+    import tvdb_api
+    from rich import box
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+    from rich.text import Text
 
     # Layout erzeugen
     layout = create_layout()
 
     # Tabelle fuer die einzelnen Episoden
-    table = create_table()
+    table = EpisodeTable()
 
     episodes_found = []
     size = 0
@@ -523,7 +637,8 @@ def tvnamer(paths):
         from .test_cache import get_test_cache_session
         cache = get_test_cache_session()
     else:
-        cache = True
+        # Fall back to tvdb_api's cache in the temp dir
+        cache = get_cache_dir() or True
 
     tvdb_instance = tvdb_api.Tvdb(
         interactive=not Config["select_first"],
@@ -550,6 +665,9 @@ def tvnamer(paths):
     layout.get("body").update(Panel(table, box= box.ROUNDED, style="cyan"))
 
     with Live(layout, auto_refresh=True, refresh_per_second=2):
+        # Serien parallel vorab laden
+        prefetch_series(tvdb_instance, episodes_found)
+
         # Informationen zu den Episoden ermitteln
         for episode in progress.track(episodes_found):
             process_file(tvdb_instance, episode, table)
@@ -572,6 +690,11 @@ def create_layout():
     """
     Erzeugt das Layout fuer die Bildschirmausgaben.
     """
+    from rich import box
+    from rich.layout import Layout
+    from rich.panel import Panel
+    from rich.table import Table
+
     layout = Layout()
 
     header = Layout(name="header", size=6)
@@ -616,6 +739,9 @@ def create_table(show_time=False):
     """
     Erzeugt die Tabelle fuer die Ausgabe der einzelnen Episoden.
     """
+    from rich import box
+    from rich.table import Table
+
     table = Table(expand=True, box=box.ROUNDED, border_style="bright_black")
     table.add_column("Original", style="bright_yellow", header_style="white bold")
     table.add_column("Neu", style="green", header_style="white bold")
@@ -628,14 +754,85 @@ def create_table(show_time=False):
     return table
 
 
+class EpisodeTable(object):
+    """
+    Tabelle der Episoden fuer die Live-Anzeige. Behaelt nur die letzten
+    TABLE_MAX_ROWS Episoden-Zeilen (plus die Summenzeilen) und erzeugt daraus
+    bei jedem Refresh eine neue Tabelle mit create_table().
+    """
+
+    def __init__(self, show_time=False):
+        # type: (bool) -> None
+        self.show_time = show_time
+        self.episode_rows = collections.deque(maxlen=TABLE_MAX_ROWS) # type: collections.deque
+        self.summary_rows = [] # type: List[Tuple[Tuple[Any, ...], Dict[str, Any]]]
+
+    def add_episode_row(self, *cells):
+        # type: (*Any) -> None
+        """
+        Fuegt eine Episoden-Zeile hinzu, die aelteste faellt bei mehr als
+        TABLE_MAX_ROWS Zeilen heraus.
+        """
+        self.episode_rows.append(cells)
+
+    def add_row(self, *cells, **kwargs):
+        # type: (*Any, **Any) -> None
+        """
+        Fuegt eine Summenzeile hinzu (Argumente wie bei Table.add_row).
+        """
+        self.summary_rows.append((cells, kwargs))
+
+    def __rich__(self):
+        # type: () -> Table
+        table = create_table(show_time=self.show_time)
+        # Kopie, da die Live-Anzeige aus einem eigenen Thread rendert
+        for cells in list(self.episode_rows):
+            table.add_row(*cells)
+        for cells, kwargs in list(self.summary_rows):
+            table.add_row(*cells, **kwargs)
+        return table
+
+
+def read_key():
+    # type: () -> str
+    """
+    Liest eine einzelne Taste, ohne auf Enter zu warten. Liefert am Ende der
+    Eingabe (z.B. bei umgeleitetem stdin) einen leeren String.
+    """
+    if not sys.stdin.isatty():
+        return sys.stdin.read(1)
+
+    try:
+        import termios
+        import tty
+    except ImportError:
+        # Windows
+        import msvcrt
+        return msvcrt.getwch()
+
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        # cbreak statt raw, damit Strg+C und die Ausgabe von rich funktionieren
+        tty.setcbreak(fd)
+        return sys.stdin.read(1)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+
 def wait(layout, episodes_found):
     # type: (Layout, List[BaseInfo]) -> None
     """
     Warten auf Tastatureingabe des Users.
     """
-    keyboard.add_hotkey('m', lambda: move_files(layout, episodes_found))
-    keyboard.add_hotkey('r', lambda: move_files(layout, episodes_found, rename_only=True))
-    keyboard.wait('q')
+    while True:
+        key = read_key()
+        if key == 'm':
+            move_files(layout, episodes_found)
+        elif key == 'r':
+            move_files(layout, episodes_found, rename_only=True)
+        elif key in ('q', ''):
+            break
 
 
 def time_convert(sec):
@@ -650,6 +847,11 @@ def move_files(layout, episodes_found, rename_only=False):
     """
     Verschieben der Dateien nach Anzeige und Auswahl [m]
     """
+    from rich import box
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+    from rich.text import Text
 
     # Prograssbar neu erzeugen und anzeigen
     text_column = TextColumn(" [white]Fortschritt:[/]")
@@ -660,7 +862,7 @@ def move_files(layout, episodes_found, rename_only=False):
     layout.update(layout.get("footer"))
 
     # Tabelle fuer die Verschiebung neu erzeugen und anzeigen
-    table = create_table(show_time=True)
+    table = EpisodeTable(show_time=True)
     layout.get("body").update(Panel(table, box=box.ROUNDED, style="cyan"))
     layout.update(layout.get("body"))
 
@@ -677,10 +879,10 @@ def move_files(layout, episodes_found, rename_only=False):
 
             # Zeitmessung starten
             start_time = time()
-            # Renamer erzeugen
-            cnamer = Renamer(episode.fullpath)
-            # Neuen Dateinamen generieren
-            new_name = episode.generate_filename()
+            # Renamer aus process_file wiederverwenden, er kennt den aktuellen Pfad der Datei
+            cnamer = episode.renamer or Renamer(episode.fullpath)
+            # Neuer Dateiname, wenn moeglich aus process_file
+            new_name = episode.new_name or episode.generate_filename()
             # Datei umbenennen
             do_rename_file(cnamer, new_name)
 
@@ -700,8 +902,8 @@ def move_files(layout, episodes_found, rename_only=False):
             sum_size += episode.filesize_in_bytes
 
             # Zeile in Table ausgeben
-            table.add_row(episode.originalfilename, new_name, get_move_destination(episode),
-                          episode.filesize, time_convert(elapsed))
+            table.add_episode_row(episode.originalfilename, new_name, get_move_destination(episode),
+                                  episode.filesize, time_convert(elapsed))
 
         # Summenzeile ausgeben
         col_text = Text("Gesamt:", justify="right", style="bright_yellow")
@@ -716,6 +918,24 @@ def move_files(layout, episodes_found, rename_only=False):
         layout.get("footer").get("footer_right").update(Panel(msg_text, box=box.ROUNDED, style="cyan"))
 
 
+def load_config(path):
+    # type: (str) -> Dict[str, Any]
+    """Loads a JSON config file, raising ValueError if it is not valid JSON
+    """
+    path = os.path.expanduser(path)
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _loaded_configs:
+        with open(path, "rb") as f:
+            data = f.read()
+        if orjson is not None:
+            _loaded_configs[key] = orjson.loads(data)
+        else:
+            _loaded_configs[key] = json.loads(data.decode("utf-8"))
+
+    # Callers may update the returned dict
+    return dict(_loaded_configs[key])
+
+
 def main():
     # type: () -> None
     """Parses command line arguments, displays errors from tvnamer in terminal
@@ -725,9 +945,10 @@ def main():
     opts, args = opter.parse_args()
 
     if opts.show_version:
-        print("tvnamer version: %s" % (__version__,))
-        print("tvdb_api version: %s" % (tvdb_api.__version__,))
-        print("python version: %s" % (sys.version,))
+        import tvdb_api
+        builtins.print("tvnamer version: %s" % (__version__,))
+        builtins.print("tvdb_api version: %s" % (tvdb_api.__version__,))
+        builtins.print("python version: %s" % (sys.version,))
         sys.exit(0)
 
     if opts.verbose:
@@ -763,7 +984,7 @@ def main():
             LOG.warning("Config must be moved to new location: ~/.config/tvnamer/tvnamer.json")
 
         try:
-            loaded_config = json.load(open(os.path.expanduser(config_to_load)))
+            loaded_config = load_config(config_to_load)
         except ValueError as e:
             LOG.error("Error loading config: %s" % e)
             opter.exit(1)
@@ -780,18 +1001,16 @@ def main():
         del config_to_save["saveconfig"]
         del config_to_save["loadconfig"]
         del config_to_save["showconfig"]
-        json.dump(
-            config_to_save,
-            open(os.path.expanduser(opts.saveconfig), "w+"),
-            sort_keys=True,
-            indent=4,
-        )
+        # Serialised in one go and written with a single write
+        with open(os.path.expanduser(opts.saveconfig), "w+") as f:
+            f.write(json.dumps(config_to_save, sort_keys=True, indent=4))
 
         opter.exit(0)
 
     # Show config argument
     if opts.showconfig:
-        print(json.dumps(opts.__dict__, sort_keys=True, indent=2))
+        # Not rich's print, which would treat parts of the patterns as markup
+        builtins.print(json.dumps(opts.__dict__, sort_keys=True, indent=2))
         return
 
     # Process values
@@ -2,6 +2,7 @@
 
 import os
 import types
+import tempfile
 
 import requests_cache.backends  # noqa: E402
 import requests_cache.backends.base  # noqa: E402
@@ -22,6 +23,14 @@ import pickle
 ALLOW_CACHE_WRITE_ENV_VAR = "TVNAMER_TESTS_ALLOW_CACHE_WRITE"
 ALLOW_CACHE_WRITE = os.getenv(ALLOW_CACHE_WRITE_ENV_VAR, "0") == "1"
 
+# Overrides the location of the cache directory (defaults to tests/httpcache)
+CACHE_DIR_ENV_VAR = "TVNAMER_HTTP_CACHE_DIR"
+
+# Unpickled cache entries, keyed by file path. requests_cache looks each
+# response up more than once, and the same handful of shows are requested
+# by most tests, so avoid re-reading and unpickling the same files.
+_loaded = {}
+
 
 class FileCacheDict(MutableMapping):
     def __init__(self, base_dir):
@@ -29,9 +38,12 @@ class FileCacheDict(MutableMapping):
 
     def __getitem__(self, key):
         path = os.path.join(self._base_dir, key)
+        if path in _loaded:
+            return _loaded[path]
         try:
             with open(path, "rb") as f:
                 data = pickle.load(f)
+                _loaded[path] = data
                 return data
         except FileNotFoundError:
             if not ALLOW_CACHE_WRITE:
@@ -41,9 +53,14 @@ class FileCacheDict(MutableMapping):
     def __setitem__(self, key, item):
         if ALLOW_CACHE_WRITE:
             path = os.path.join(self._base_dir, key)
-            with open(path, "wb") as f:
+            # Write to a temporary file and rename it into place, so tests
+            # running in parallel never see a partially written entry
+            fd, tmppath = tempfile.mkstemp(dir=self._base_dir, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
                 # Dump with protocol 2 to allow Python 2.7 support
                 f.write(pickle.dumps(item, protocol=2))
+            os.replace(tmppath, path)
+            _loaded[path] = item
         else:
             raise RuntimeError(
                 "Requested uncached URL and $%s not set to 1" % (ALLOW_CACHE_WRITE_ENV_VAR)
@@ -75,14 +92,24 @@ class FileCache(requests_cache.backends.base.BaseCache):
 requests_cache.backends.registry['tvnamer_file_cache'] = FileCache
 
 
+# Sessions by cache directory, so repeated tvnamer runs in one process (see
+# tvnamer._testserver) share a session and its connection pool
+_sessions = {}
+
+
 def get_test_cache_session():
     here = os.path.dirname(os.path.abspath(__file__))
+    base_dir = os.getenv(CACHE_DIR_ENV_VAR, os.path.join(here, "..", "tests", "httpcache"))
+    if base_dir in _sessions:
+        return _sessions[base_dir]
+
     sess = requests_cache.CachedSession(
         backend="tvnamer_file_cache",
-        fc_base_dir=os.path.join(here, "..", "tests", "httpcache"),
+        fc_base_dir=base_dir,
         include_get_headers=True,
         allowable_codes=(200, 404),
     )
     import tvdb_api
     sess.cache.create_key = types.MethodType(tvdb_api.create_key, sess.cache)
+    _sessions[base_dir] = sess
     return sess
@@ -11,8 +11,7 @@ import shutil
 import logging
 import platform
 import errno
-
-from tvdb_api import Tvdb
+import functools
 
 import tvnamer
 from tvnamer.config import Config
@@ -41,9 +40,18 @@ def warn(text):
     print(text, file=sys.stderr)
 
 
+@functools.lru_cache(maxsize=None)
+def _compile(pattern, flags=0):
+    # type: (str, int) -> Pattern
+    """Compiles pattern, caching the result so each configured pattern
+    is compiled once, rather than once for every file processed
+    """
+    return re.compile(pattern, flags)
+
+
 def split_extension(filename):
     # type: (str) -> Tuple[str, str]
-    base = re.sub(Config["extension_pattern"], "", filename)
+    base = _compile(Config["extension_pattern"]).sub("", filename)
     ext = filename.replace(base, "")
     return base, ext
 
@@ -66,7 +74,7 @@ def _apply_replacements(cfile, replacements):
             cext = ""
 
         if 'is_regex' in rep and rep['is_regex']:
-            cfile = re.sub(rep['match'], rep['replacement'], cfile)
+            cfile = _compile(rep['match']).sub(rep['replacement'], cfile)
         else:
             cfile = cfile.replace(rep['match'], rep['replacement'])
 
@@ -140,7 +148,7 @@ def make_valid_filename(
         blacklist += custom_blacklist
 
     # Replace every blacklisted character with a underscore
-    value = re.sub("[%s]" % re.escape(blacklist), replace_with, value)
+    value = _compile("[%s]" % re.escape(blacklist)).sub(replace_with, value)
 
     # Remove any trailing whitespace
     value = value.strip()